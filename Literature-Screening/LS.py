@@ -7,6 +7,8 @@ import xml.etree.ElementTree as ET
 from datetime import datetime
 import tkinter as tk
 from tkinter import messagebox
+from openpyxl import load_workbook
+from openpyxl.styles import PatternFill
 
 BASE_URL = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/"
 TOOL = "pubmed_automation"
@@ -14,96 +16,92 @@ EMAIL = os.getenv("NCBI_EMAIL", "sales@iziel.com")  # set env var NCBI_EMAIL
 API_KEY = os.getenv("NCBI_API_KEY")  # optional but recommended
 
 # ---------- UI ----------
-def collect_inputs():
-    # if user chooses date filter
-    if date_filter_var.get():
-        from_date = from_date_entry.get().strip()
-        to_date = to_date_entry.get().strip()
-
-        # validate only if user entered a value
-        if from_date:
-            try:
-                datetime.strptime(from_date, "%Y-%m-%d")
-            except ValueError:
-                messagebox.showerror("Input Error", "FROM date must be in YYYY-MM-DD format.")
-                return
-
-        if to_date:
-            try:
-                datetime.strptime(to_date, "%Y-%m-%d")
-            except ValueError:
-                messagebox.showerror("Input Error", "TO date must be in YYYY-MM-DD format.")
-                return
-
-        root.from_date = from_date if from_date else None
-        root.to_date = to_date if to_date else None
-    else:
-        root.from_date = None
-        root.to_date = None
-
-
-    root.apply_abstract = abstract_var.get()
-    root.apply_free_full_text = free_full_text_var.get()
-    root.apply_full_text = full_text_var.get()
-    root.destroy()
-
-root = tk.Tk()
-root.title("PubMed Filter Selection")
+def ask_filters():
+    """Show the filter dialog and return the chosen date range and availability filters."""
+    root = tk.Tk()
+    root.title("PubMed Filter Selection")
+    root.filters = None
+
+    def collect_inputs():
+        # if user chooses date filter
+        if date_filter_var.get():
+            from_date = from_date_entry.get().strip()
+            to_date = to_date_entry.get().strip()
+
+            # validate only if user entered a value
+            if from_date:
+                try:
+                    datetime.strptime(from_date, "%Y-%m-%d")
+                except ValueError:
+                    messagebox.showerror("Input Error", "FROM date must be in YYYY-MM-DD format.")
+                    return
+
+            if to_date:
+                try:
+                    datetime.strptime(to_date, "%Y-%m-%d")
+                except ValueError:
+                    messagebox.showerror("Input Error", "TO date must be in YYYY-MM-DD format.")
+                    return
+        else:
+            from_date = to_date = ""
 
-# NEW checkbox to let user decide
-date_filter_var = tk.BooleanVar()
-tk.Checkbutton(root, text="Apply Date Filter", variable=date_filter_var).grid(row=0, column=0, sticky="w", columnspan=2)
+        root.filters = {
+            "from_date": from_date or None,
+            "to_date": to_date or None,
+            "apply_abstract": abstract_var.get(),
+            "apply_free": free_full_text_var.get(),
+            "apply_full": full_text_var.get(),
+        }
+        root.destroy()
 
-tk.Label(root, text="Enter FROM date (YYYY-MM-DD):").grid(row=1, column=0, sticky="w")
-from_date_entry = tk.Entry(root, width=20)
-from_date_entry.grid(row=1, column=1, padx=5, pady=5)
+    # NEW checkbox to let user decide
+    date_filter_var = tk.BooleanVar()
+    tk.Checkbutton(root, text="Apply Date Filter", variable=date_filter_var).grid(row=0, column=0, sticky="w", columnspan=2)
 
-tk.Label(root, text="Enter TO date (YYYY-MM-DD):").grid(row=2, column=0, sticky="w")
-to_date_entry = tk.Entry(root, width=20)
-to_date_entry.grid(row=2, column=1, padx=5, pady=5)
+    tk.Label(root, text="Enter FROM date (YYYY-MM-DD):").grid(row=1, column=0, sticky="w")
+    from_date_entry = tk.Entry(root, width=20)
+    from_date_entry.grid(row=1, column=1, padx=5, pady=5)
 
-tk.Label(root, text="Text Availability Filters:").grid(row=3, column=0, sticky="w", pady=(10, 0))
-abstract_var = tk.BooleanVar()
-free_full_text_var = tk.BooleanVar()
-full_text_var = tk.BooleanVar()
-tk.Checkbutton(root, text="Abstract", variable=abstract_var).grid(row=4, column=0, sticky="w")
-tk.Checkbutton(root, text="Free full text", variable=free_full_text_var).grid(row=5, column=0, sticky="w")
-tk.Checkbutton(root, text="Full text", variable=full_text_var).grid(row=6, column=0, sticky="w")
+    tk.Label(root, text="Enter TO date (YYYY-MM-DD):").grid(row=2, column=0, sticky="w")
+    to_date_entry = tk.Entry(root, width=20)
+    to_date_entry.grid(row=2, column=1, padx=5, pady=5)
 
-tk.Button(root, text="Submit", command=collect_inputs).grid(row=7, column=0, columnspan=2, pady=10)
+    tk.Label(root, text="Text Availability Filters:").grid(row=3, column=0, sticky="w", pady=(10, 0))
+    abstract_var = tk.BooleanVar()
+    free_full_text_var = tk.BooleanVar()
+    full_text_var = tk.BooleanVar()
+    tk.Checkbutton(root, text="Abstract", variable=abstract_var).grid(row=4, column=0, sticky="w")
+    tk.Checkbutton(root, text="Free full text", variable=free_full_text_var).grid(row=5, column=0, sticky="w")
+    tk.Checkbutton(root, text="Full text", variable=full_text_var).grid(row=6, column=0, sticky="w")
 
-#  Pre-fill default dates for testing
-from_date_entry.insert(0, "2024-08-02")
-to_date_entry.insert(0, "2025-07-30")
+    tk.Button(root, text="Submit", command=collect_inputs).grid(row=7, column=0, columnspan=2, pady=10)
 
-root.mainloop()
+    #  Pre-fill default dates for testing
+    from_date_entry.insert(0, "2024-08-02")
+    to_date_entry.insert(0, "2025-07-30")
 
+    root.mainloop()
 
-FROM_DATE = root.from_date
-TO_DATE = root.to_date
-APPLY_ABSTRACT = root.apply_abstract
-APPLY_FREE = root.apply_free_full_text
-APPLY_FULL = root.apply_full_text
+    if root.filters is None:
+        raise SystemExit("Filter dialog closed without submitting.")
+    return root.filters
 
-# ---------- Paths ----------
-script_dir = os.path.dirname(os.path.abspath(__file__))
-csv_dir = os.path.join(script_dir, "All-CSV")
-os.makedirs(csv_dir, exist_ok=True)
 
 # ---------- Load keywords ----------
-df = pd.read_excel("keywords.xlsx", header=0)
-df.columns = df.columns.str.strip()
-
-if "Keyword No." not in df.columns or "Keywords" not in df.columns:
-    raise ValueError("Required columns 'Keyword No.' and 'Keywords' not found in Excel.")
+def load_keywords(path: str):
+    """Returns (keywords DataFrame, [(Keyword No., Keywords, Filters)] for rows starting with '#')."""
+    df = pd.read_excel(path, header=0)
+    df.columns = df.columns.str.strip()
 
-filtered_df = df[df["Keyword No."].astype(str).str.startswith("#")].copy()
-filters_col = filtered_df["Filters"] if "Filters" in filtered_df.columns else pd.Series([""] * len(filtered_df))
+    if "Keyword No." not in df.columns or "Keywords" not in df.columns:
+        raise ValueError("Required columns 'Keyword No.' and 'Keywords' not found in Excel.")
 
-# Use "Keywords" instead of "Keyword"
-keywords = list(zip(filtered_df["Keyword No."], filtered_df["Keywords"], filters_col.fillna("")))
+    filtered_df = df[df["Keyword No."].astype(str).str.startswith("#")].copy()
+    filters_col = filtered_df["Filters"] if "Filters" in filtered_df.columns else pd.Series([""] * len(filtered_df))
 
-print(f"✅ Filtered {len(keywords)} keywords starting with '#'")
+    # Use "Keywords" instead of "Keyword"
+    keywords = list(zip(filtered_df["Keyword No."], filtered_df["Keywords"], filters_col.fillna("")))
+    return df, keywords
 
 # ---------- Helpers ----------
 session = requests.Session()
@@ -115,17 +113,17 @@ def _common_params():
         p["api_key"] = API_KEY
     return p
 
-def build_query(keyword: str, filters_csv: str) -> str:
+def build_query(keyword: str, filters_csv: str, apply_abstract=False, apply_free=False, apply_full=False) -> str:
     """Compose the PubMed term with English+Humans + availability + article types."""
     parts = [f"({keyword})", "english[lang]", "humans[mh]"]
 
     # availability filters (OR logic, like PubMed UI)
     avail_terms = []
-    if APPLY_ABSTRACT:
+    if apply_abstract:
         avail_terms.append("hasabstract[text]")
-    if APPLY_FREE:
+    if apply_free:
         avail_terms.append("free full text[sb]")
-    if APPLY_FULL:
+    if apply_full:
         avail_terms.append("full text[sb]")
     if avail_terms:
         parts.append("(" + " OR ".join(avail_terms) + ")")
@@ -269,144 +267,154 @@ def xml_to_records(xml_text: str):
         })
     return records
 
-# ---------- Main loop ----------
-missed = []
-hit_counts = {}   # NEW: store keyword hits
+# Merge.py (fixed for API output)
+def merge_csvs(csv_dir: str, output_path: str):
+    combined_rows = []
+    required_cols = ["PMID", "Title", "Journal", "PubDate", "Authors",
+                     "PublicationTypes", "DOI", "Abstract", "PubMedURL"]
 
-for keyword_no, keyword, filters_csv in keywords:
-    print(f"\n🔍 Searching: {keyword} ({keyword_no})")
-    term = build_query(keyword, filters_csv)
-    try:
-        count, qk, we = esearch_with_history(term, FROM_DATE, TO_DATE)
-        print(f"   • Matches: {count}")
+    for file_name in sorted(os.listdir(csv_dir)):
+        if file_name.endswith(".csv") and file_name.startswith("#"):
+            keyword_no = os.path.splitext(file_name)[0]
+            file_path = os.path.join(csv_dir, file_name)
 
-        hit_counts[keyword_no] = count   # NEW
+            try:
+                df = pd.read_csv(file_path)
+                if not all(col in df.columns for col in required_cols):
+                    print(f"⚠️ Skipped {file_name}: Missing required columns.")
+                    continue
+
+                for idx, row in df.iterrows():
+                    pmid = str(row["PMID"]).strip()
+                    combined_rows.append({
+                        "KeywordNo": keyword_no,
+                        "KeyCodeNo": f"{keyword_no}.{idx + 1}",
+                        "PMID": pmid,
+                        "Title": row["Title"],
+                        "Journal": row["Journal"],
+                        "PubDate": row["PubDate"],
+                        "Authors": row["Authors"],
+                        "PublicationTypes": row["PublicationTypes"],
+                        "DOI": row["DOI"],
+                        "Abstract": row["Abstract"],
+                        "PubMedURL": row["PubMedURL"]
+                    })
+
+            except Exception as e:
+                print(f"❌ Error processing {file_name}: {e}")
+
+    if not combined_rows:
+        print("⚠️ No data found in CSVs.")
+        return
+
+    combined_df = pd.DataFrame(combined_rows)
+    combined_df.insert(0, "Sr.No", range(1, len(combined_df) + 1))
+
+    master_df = combined_df.drop_duplicates(subset="PMID", keep="first").reset_index(drop=True)
+    master_df["Sr.No"] = range(1, len(master_df) + 1)
+
+    duplicates = combined_df.duplicated(subset="PMID", keep=False)
+    highlight_df = combined_df.copy()
+
+    with pd.ExcelWriter(output_path, engine='openpyxl') as writer:
+        combined_df.to_excel(writer, sheet_name="Combined", index=False)
+        highlight_df.to_excel(writer, sheet_name="Duplicate", index=False)
+        master_df.to_excel(writer, sheet_name="Master", index=False)
+
+    wb = load_workbook(output_path)
+    ws = wb["Duplicate"]
+    fill = PatternFill(start_color="FFFF00", end_color="FFFF00", fill_type="solid")
+
+    for row_idx, is_dup in enumerate(duplicates, start=2):
+        if is_dup:
+            for col in range(1, ws.max_column + 1):
+                ws.cell(row=row_idx, column=col).fill = fill
+
+    wb.save(output_path)
+
+    print(f"✅ Excel file created with 3 sheets: {output_path}")
 
-        if count == 0:
-            missed.append((keyword_no, keyword))
-            continue
 
-        all_rows = []
-        BATCH = 200
-        loops = math.ceil(count / BATCH)
-        for i in range(loops):
-            retstart = i * BATCH
-            time.sleep(DEFAULT_SLEEP)
-            xml_text = efetch_batch(qk, we, retstart, BATCH)
-            rows = xml_to_records(xml_text)
-            all_rows.extend(rows)
-            print(f"   • Fetched {len(rows)} (total {len(all_rows)}/{count})")
-
-        out_path = os.path.join(csv_dir, f"{keyword_no}.csv")
-        pd.DataFrame(all_rows).to_csv(out_path, index=False)
-        print(f"📁 Saved: {out_path}")
-
-    except Exception as e:
-        print(f"⚠️ Failed for {keyword} → {e}")
-        missed.append((keyword_no, keyword))
-        hit_counts[keyword_no] = 0   # NEW
-        time.sleep(1.0)
-
-# ---------- Missed ----------
-if missed:
-    pd.DataFrame(missed, columns=["Keyword No.", "Keywords"]).to_excel(
-        os.path.join(script_dir, "Missed.xlsx"), index=False
-    )
-    print("⚠️ Missed keywords saved → Missed.xlsx")
-else:
-    print("✅ All keywords processed without misses.")
-
-print(f"\nAll CSVs saved in: {csv_dir}")
-
-# ---------- Update keywords.xlsx with hit counts ----------
-if "Number of Hits" not in df.columns:
-    df["Number of Hits"] = ""
-
-for idx, row in df.iterrows():
-    k_no = row["Keyword No."]
-    if k_no in hit_counts:
-        old_val = str(row.get("Number of Hits", "")).strip()
-        new_val = str(hit_counts[k_no])
-        if old_val and old_val.lower() != "nan":
-            df.at[idx, "Number of Hits"] = f"{old_val}, {new_val}"
-        else:
-            df.at[idx, "Number of Hits"] = new_val
+# ---------- Main loop ----------
+def main():
+    filters = ask_filters()
 
-df.to_excel("keywords.xlsx", index=False)
-print("✅ Updated keywords.xlsx with hit counts")
+    # ---------- Paths ----------
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    csv_dir = os.path.join(script_dir, "All-CSV")
+    os.makedirs(csv_dir, exist_ok=True)
 
-# Merge.py (fixed for API output)
-import os
-import pandas as pd
-from openpyxl import load_workbook
-from openpyxl.styles import PatternFill
+    df, keywords = load_keywords("keywords.xlsx")
+    print(f"✅ Filtered {len(keywords)} keywords starting with '#'")
 
-script_dir = os.path.dirname(os.path.abspath(__file__))
-csv_dir = os.path.join(script_dir, "All-CSV")
-output_path = os.path.join(script_dir, "All-Merged.xlsx")
+    missed = []
+    hit_counts = {}   # NEW: store keyword hits
 
-combined_rows = []
-required_cols = ["PMID", "Title", "Journal", "PubDate", "Authors",
-                 "PublicationTypes", "DOI", "Abstract", "PubMedURL"]
+    for keyword_no, keyword, filters_csv in keywords:
+        print(f"\n🔍 Searching: {keyword} ({keyword_no})")
+        term = build_query(keyword, filters_csv, filters["apply_abstract"],
+                           filters["apply_free"], filters["apply_full"])
+        try:
+            count, qk, we = esearch_with_history(term, filters["from_date"], filters["to_date"])
+            print(f"   • Matches: {count}")
 
-for file_name in sorted(os.listdir(csv_dir)):
-    if file_name.endswith(".csv") and file_name.startswith("#"):
-        keyword_no = os.path.splitext(file_name)[0]
-        file_path = os.path.join(csv_dir, file_name)
+            hit_counts[keyword_no] = count   # NEW
 
-        try:
-            df = pd.read_csv(file_path)
-            if not all(col in df.columns for col in required_cols):
-                print(f"⚠️ Skipped {file_name}: Missing required columns.")
+            if count == 0:
+                missed.append((keyword_no, keyword))
                 continue
 
-            for idx, row in df.iterrows():
-                pmid = str(row["PMID"]).strip()
-                combined_rows.append({
-                    "KeywordNo": keyword_no,
-                    "KeyCodeNo": f"{keyword_no}.{idx + 1}",
-                    "PMID": pmid,
-                    "Title": row["Title"],
-                    "Journal": row["Journal"],
-                    "PubDate": row["PubDate"],
-                    "Authors": row["Authors"],
-                    "PublicationTypes": row["PublicationTypes"],
-                    "DOI": row["DOI"],
-                    "Abstract": row["Abstract"],
-                    "PubMedURL": row["PubMedURL"]
-                })
+            all_rows = []
+            BATCH = 200
+            loops = math.ceil(count / BATCH)
+            for i in range(loops):
+                retstart = i * BATCH
+                time.sleep(DEFAULT_SLEEP)
+                xml_text = efetch_batch(qk, we, retstart, BATCH)
+                rows = xml_to_records(xml_text)
+                all_rows.extend(rows)
+                print(f"   • Fetched {len(rows)} (total {len(all_rows)}/{count})")
+
+            out_path = os.path.join(csv_dir, f"{keyword_no}.csv")
+            pd.DataFrame(all_rows).to_csv(out_path, index=False)
+            print(f"📁 Saved: {out_path}")
 
         except Exception as e:
-            print(f"❌ Error processing {file_name}: {e}")
-
-if not combined_rows:
-    print("⚠️ No data found in CSVs.")
-    exit()
-
-combined_df = pd.DataFrame(combined_rows)
-combined_df.insert(0, "Sr.No", range(1, len(combined_df) + 1))
+            print(f"⚠️ Failed for {keyword} → {e}")
+            missed.append((keyword_no, keyword))
+            hit_counts[keyword_no] = 0   # NEW
+            time.sleep(1.0)
+
+    # ---------- Missed ----------
+    if missed:
+        pd.DataFrame(missed, columns=["Keyword No.", "Keywords"]).to_excel(
+            os.path.join(script_dir, "Missed.xlsx"), index=False
+        )
+        print("⚠️ Missed keywords saved → Missed.xlsx")
+    else:
+        print("✅ All keywords processed without misses.")
 
-master_df = combined_df.drop_duplicates(subset="PMID", keep="first").reset_index(drop=True)
-master_df["Sr.No"] = range(1, len(master_df) + 1)
+    print(f"\nAll CSVs saved in: {csv_dir}")
 
-duplicates = combined_df.duplicated(subset="PMID", keep=False)
-highlight_df = combined_df.copy()
+    # ---------- Update keywords.xlsx with hit counts ----------
+    if "Number of Hits" not in df.columns:
+        df["Number of Hits"] = ""
 
-with pd.ExcelWriter(output_path, engine='openpyxl') as writer:
-    combined_df.to_excel(writer, sheet_name="Combined", index=False)
-    highlight_df.to_excel(writer, sheet_name="Duplicate", index=False)
-    master_df.to_excel(writer, sheet_name="Master", index=False)
+    for idx, row in df.iterrows():
+        k_no = row["Keyword No."]
+        if k_no in hit_counts:
+            old_val = str(row.get("Number of Hits", "")).strip()
+            new_val = str(hit_counts[k_no])
+            if old_val and old_val.lower() != "nan":
+                df.at[idx, "Number of Hits"] = f"{old_val}, {new_val}"
+            else:
+                df.at[idx, "Number of Hits"] = new_val
 
-wb = load_workbook(output_path)
-ws = wb["Duplicate"]
-fill = PatternFill(start_color="FFFF00", end_color="FFFF00", fill_type="solid")
+    df.to_excel("keywords.xlsx", index=False)
+    print("✅ Updated keywords.xlsx with hit counts")
 
-pmid_col_index = list(highlight_df.columns).index("PMID") + 1
-for row_idx, is_dup in enumerate(duplicates, start=2):
-    if is_dup:
-        for col in range(1, ws.max_column + 1):
-            ws.cell(row=row_idx, column=col).fill = fill
+    merge_csvs(csv_dir, os.path.join(script_dir, "All-Merged.xlsx"))
 
-wb.save(output_path)
 
-print(f"✅ Excel file created with 3 sheets: {output_path}")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,534 @@
+import os
+import sys
+import math
+import time
+import queue
+import shutil
+import threading
+import importlib.util
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.chrome.options import Options
+from webdriver_manager.chrome import ChromeDriverManager
+
+# Streaming orchestrator: search -> dedup -> screening -> PMCID lookup + PDF download
+# -> full-text extraction.
+# Stages hand records to each other through bounded queues instead of Excel files,
+# so screening starts as soon as the first PubMed batch arrives and "Include"
+# decisions are downloaded straight away; each downloaded PDF is parsed into the
+# pdf_text.py cache while the remaining downloads continue.
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+repo_dir = os.path.dirname(script_dir)
+sys.path.insert(0, os.path.join(repo_dir, "Literature-Screening"))
+sys.path.insert(0, os.path.join(repo_dir, "Primary-Screening"))
+
+import LS  # noqa: E402  (PubMed query, fetch and parsing)
+import PS  # noqa: E402  (screen_abstract, read_ifu_from_pdf)
+import pdf_text  # noqa: E402
+
+# SS-pdf-download.py isn't a valid module name, load it from its path
+_ss_spec = importlib.util.spec_from_file_location(
+    "SS", os.path.join(repo_dir, "Secondary-Screening-pdf-download", "SS-pdf-download.py"))
+SS = importlib.util.module_from_spec(_ss_spec)
+_ss_spec.loader.exec_module(SS)
+SS.Entrez.email = LS.EMAIL
+if LS.API_KEY:
+    SS.Entrez.api_key = LS.API_KEY
+PS.DEBUG = False  # raw LangFlow responses from parallel screen workers are too noisy
+
+# ---------------- CONFIG ----------------
+KEYWORDS_EXCEL = os.path.join(repo_dir, "Literature-Screening", "keywords.xlsx")
+IFU_PDF = os.path.join(repo_dir, "Primary-Screening", "ifu.pdf")
+DOWNLOAD_FOLDER = os.path.join(repo_dir, "Secondary-Screening-pdf-download", "pdf download")
+OUTPUT_EXCEL = os.path.join(script_dir, "pipeline_results.xlsx")
+
+# Search filters (same meaning as the LS.py dialog)
+FROM_DATE = None          # "YYYY-MM-DD" or None
+TO_DATE = None            # "YYYY-MM-DD" or None
+APPLY_ABSTRACT = False
+APPLY_FREE = False
+APPLY_FULL = False
+
+# Per-stage concurrency
+SEARCH_WORKERS = 2        # keywords searched in parallel
+SCREEN_WORKERS = 4        # parallel LangFlow calls
+DOWNLOAD_WORKERS = 2      # one Chrome instance each
+EXTRACT_WORKERS = 2       # PDFs extracted at once (pages share one process pool)
+QUEUE_SIZE = 200          # max records waiting between two stages
+POLL_INTERVAL = 0.5       # how often blocked workers check for shutdown
+
+EFETCH_BATCH = 200
+DOWNLOAD_TIMEOUT = 60     # seconds to wait for a PDF to finish downloading
+NCBI_INTERVAL = LS.DEFAULT_SLEEP  # shared by all NCBI calls across threads
+# ----------------------------------------
+
+_STOP = object()  # end-of-stream marker passed down the queues
+
+
+class StageStats:
+    """Thread-safe counters for one pipeline stage."""
+
+    def __init__(self, name: str, unit: str = ""):
+        self.name = name
+        self.unit = unit          # optional secondary count, e.g. "pages"
+        self.processed = 0
+        self.errors = 0
+        self.units = 0
+        self.started = None
+        self.finished = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self.started is None:
+                self.started = time.time()
+
+    def done(self, ok: bool = True, units: int = 0):
+        with self._lock:
+            self.processed += 1
+            self.units += units
+            if not ok:
+                self.errors += 1
+
+    def stop(self):
+        self.finished = time.time()
+
+    def report(self) -> str:
+        if self.started is None:
+            return f"{self.name:<10} 0 items"
+        elapsed = max((self.finished or time.time()) - self.started, 1e-9)
+        line = (f"{self.name:<10} {self.processed} items "
+                f"({self.errors} errors) in {elapsed:.1f}s → {self.processed / elapsed:.2f}/s")
+        if self.unit:
+            line += f", {self.units} {self.unit} → {self.units / elapsed:.1f} {self.unit}/s"
+        return line
+
+
+class RateLimiter:
+    """Spaces out calls made from several threads to the same API."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            delay = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if delay > 0:
+            time.sleep(delay)
+
+
+ncbi_limiter = RateLimiter(NCBI_INTERVAL)
+
+
+# ---------- NCBI helpers (LS.py / SS-pdf-download.py, shared rate limit) ----------
+def esearch(term: str):
+    ncbi_limiter.wait()
+    return LS.esearch_with_history(term, FROM_DATE, TO_DATE)
+
+
+def efetch(qk: str, we: str, retstart: int):
+    ncbi_limiter.wait()
+    return LS.xml_to_records(LS.efetch_batch(qk, we, retstart, EFETCH_BATCH))
+
+
+def lookup_pmcid(pmid: str) -> str:
+    ncbi_limiter.wait()
+    return SS.lookup_pmcid(pmid)
+
+
+# ---------- Stage workers ----------
+class Pipeline:
+    def __init__(self, keywords, ifu_text: str):
+        self.keywords = keywords
+        self.ifu_text = ifu_text
+
+        self.keyword_queue = queue.Queue()
+        self.screen_queue = queue.Queue(maxsize=QUEUE_SIZE)
+        self.download_queue = queue.Queue(maxsize=QUEUE_SIZE)
+        self.extract_queue = queue.Queue(maxsize=QUEUE_SIZE)
+        self.pool = None
+        self.abort = threading.Event()  # set on Ctrl-C or when a whole stage has died
+        self.workers = {}               # stage name -> threads
+
+        self.stats = {
+            "search": StageStats("search"),
+            "screen": StageStats("screen"),
+            "download": StageStats("download"),
+            "extract": StageStats("extract", unit="pages"),
+        }
+
+        self._lock = threading.Lock()
+        self.hit_counts = {}
+        self.fetched_counts = {}
+        self.missed = []        # (Keyword No., Keywords, Reason)
+        self.master = {}        # PMID -> deduplicated search record (LS.py "Master" sheet)
+        self.screening = []     # PS.py output rows
+        self.downloads = []     # SS-pdf-download.py output rows
+        self.extracted = []     # full-text extraction rows
+
+    # --- search ---
+    def search_worker(self):
+        stats = self.stats["search"]
+        while not self.abort.is_set():
+            try:
+                kw_index, (keyword_no, keyword, filters_csv) = self.keyword_queue.get_nowait()
+            except queue.Empty:
+                return
+            stats.start()
+            print(f"🔍 Searching: {keyword} ({keyword_no})")
+            count = 0
+            fetched = 0
+            try:
+                term = LS.build_query(keyword, filters_csv, APPLY_ABSTRACT, APPLY_FREE, APPLY_FULL)
+                count, qk, we = esearch(term)
+                if count == 0:
+                    with self._lock:
+                        self.missed.append((keyword_no, keyword, "No hits"))
+                else:
+                    for i in range(math.ceil(count / EFETCH_BATCH)):
+                        if self.abort.is_set():
+                            raise RuntimeError("run aborted")
+                        rows = efetch(qk, we, i * EFETCH_BATCH)
+                        for row in rows:
+                            fetched += 1
+                            self._emit(kw_index, keyword_no, fetched, row)
+                        print(f"   • {keyword_no}: fetched {fetched}/{count}")
+                stats.done()
+            except Exception as e:
+                print(f"⚠️ Failed for {keyword} → {e}")
+                reason = f"Partial: fetched {fetched}/{count} ({e})" if fetched else f"Failed: {e}"
+                with self._lock:
+                    self.missed.append((keyword_no, keyword, reason))
+                stats.done(ok=False)
+            with self._lock:
+                self.hit_counts[keyword_no] = count
+                self.fetched_counts[keyword_no] = fetched
+
+    def _emit(self, kw_index, keyword_no, idx, row):
+        """Deduplicate by PMID and hand new records to screening.
+
+        Keywords run in parallel, so a PMID may first arrive from a later
+        keyword. It is screened once, but the Master row is credited to the
+        earliest keyword in keywords.xlsx order (LS.py merge keeps the first).
+        """
+        pmid = str(row["PMID"]).strip()
+        if not pmid:
+            return
+        record = {"KeywordNo": keyword_no, "KeyCodeNo": f"{keyword_no}.{idx}", **row}
+        order = (kw_index, idx)
+        with self._lock:
+            seen = self.master.get(pmid)
+            if seen is not None:
+                if order < seen["_order"]:
+                    self.master[pmid] = {**record, "_order": order}
+                return
+            self.master[pmid] = {**record, "_order": order}
+        self._put(self.screen_queue, record, "screen")  # blocks while screening is behind
+
+    def master_rows(self):
+        """Master records in keyword order, independent of thread timing."""
+        with self._lock:
+            rows = sorted(self.master.values(), key=lambda r: r["_order"])
+        return [{k: v for k, v in r.items() if k != "_order"} for r in rows]
+
+    # --- screening ---
+    def screen_worker(self):
+        stats = self.stats["screen"]
+        while True:
+            record = self._get(self.screen_queue)
+            if record is _STOP:
+                return
+            stats.start()
+            pmid = record["PMID"]
+            abstract = str(record["Abstract"])
+            print(f"Processing PMID={pmid}...")
+
+            row = {"PMID": pmid, "Abstract": abstract}
+            try:
+                row.update(PS.screen_abstract(self.ifu_text, abstract, f"PMID={pmid}"))
+            except Exception as e:
+                print(f"[{pmid}]  Screening error: {e}")
+                row.update({"Decision": "ERROR", "Category": None, "ExcludedCriteria": None,
+                            "Rationale": str(e)})
+            with self._lock:
+                self.screening.append(row)
+            stats.done(ok=row["Decision"] != "ERROR")
+
+            if str(row["Decision"]).strip().lower() == "include":
+                self._put(self.download_queue, record, "download")
+
+    # --- PMCID lookup + PDF download ---
+    def download_worker(self, worker_no: int):
+        stats = self.stats["download"]
+        # Each worker gets its own Chrome and scratch folder. The folder is
+        # emptied before every download and the browser is restarted after a
+        # timeout, so a late-finishing file can't be saved under the next PMID.
+        scratch = os.path.join(DOWNLOAD_FOLDER, f".worker-{worker_no}")
+        os.makedirs(scratch, exist_ok=True)
+        driver = None
+        try:
+            while True:
+                record = self._get(self.download_queue)
+                if record is _STOP:
+                    return
+                stats.start()
+                pmid = str(record.get("PMID", "Unknown"))
+                row = {"PMID": pmid, "PMCID": "", "PDF_Link": "", "Status": ""}
+                try:
+                    row["PMCID"] = lookup_pmcid(pmid)
+                    if not row["PMCID"]:
+                        print(f"[{pmid}]  No PMCID found")
+                        row["Status"] = "No PMCID"
+                    else:
+                        row["PDF_Link"] = SS.pdf_link(row["PMCID"])
+                        if driver is None:
+                            driver = self._new_driver(scratch)
+                        if self._download_pdf(driver, scratch, pmid, row["PDF_Link"]):
+                            row["Status"] = "Downloaded-S"
+                            print(f"[{pmid}]  Saved as {pmid}.pdf")
+                        else:
+                            row["Status"] = "Timeout"
+                            print(f"[{pmid}]  No fully downloaded PDF detected after {DOWNLOAD_TIMEOUT}s")
+                            driver = self._reset_driver(driver, scratch)
+                except Exception as e:
+                    print(f"[{pmid}]  Error: {e}")
+                    row["Status"] = f"Error: {e}"
+                    driver = self._reset_driver(driver, scratch)
+                with self._lock:
+                    self.downloads.append(row)
+                stats.done(ok=row["Status"] == "Downloaded-S")
+
+                if row["Status"] == "Downloaded-S":
+                    self._put(self.extract_queue, pmid, "extract")
+        finally:
+            self._reset_driver(driver, scratch)
+            shutil.rmtree(scratch, ignore_errors=True)
+
+    # --- full-text extraction ---
+    def extract_worker(self):
+        stats = self.stats["extract"]
+        while True:
+            pmid = self._get(self.extract_queue)
+            if pmid is _STOP:
+                return
+            stats.start()
+            path = os.path.join(DOWNLOAD_FOLDER, f"{pmid}.pdf")
+            row = {"PMID": pmid, "Pages": 0, "Sections": 0, "Status": ""}
+            new_pages = 0
+            try:
+                doc = pdf_text.extract_pdfs([path], pool=self.pool, verbose=False).get(path)
+                if doc is None:
+                    row["Status"] = "Unreadable PDF"
+                else:
+                    row.update({"Pages": len(doc["pages"]), "Sections": len(doc["sections"]),
+                                "Status": "Cached" if doc["cached"] else "Extracted"})
+                    if not doc["cached"]:
+                        new_pages = row["Pages"]
+            except Exception as e:
+                print(f"[{pmid}]  Extraction error: {e}")
+                row["Status"] = f"Error: {e}"
+            with self._lock:
+                self.extracted.append(row)
+            # Only newly extracted pages count towards pages/s
+            stats.done(ok=row["Status"] in ("Extracted", "Cached"), units=new_pages)
+
+    @staticmethod
+    def _new_driver(download_dir: str):
+        chrome_options = Options()
+        prefs = {
+            "download.default_directory": download_dir,
+            "download.prompt_for_download": False,
+            "download.directory_upgrade": True,
+            "plugins.always_open_pdf_externally": True,
+        }
+        chrome_options.add_experimental_option("prefs", prefs)
+        return webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=chrome_options)
+
+    @staticmethod
+    def _clear_folder(folder: str):
+        for f in os.listdir(folder):
+            try:
+                os.remove(os.path.join(folder, f))
+            except OSError:
+                pass
+
+    @classmethod
+    def _reset_driver(cls, driver, scratch: str):
+        """Quit Chrome (cancelling any unfinished download) and drop leftovers."""
+        if driver is not None:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+        cls._clear_folder(scratch)
+        return None
+
+    @classmethod
+    def _download_pdf(cls, driver, scratch: str, pmid: str, pdf_url: str) -> bool:
+        cls._clear_folder(scratch)
+        driver.get(pdf_url)
+        start_time = time.time()
+        while time.time() - start_time < DOWNLOAD_TIMEOUT:
+            ready = [f for f in os.listdir(scratch) if f.lower().endswith(".pdf")]
+            if ready:
+                SS.rename_with_retry(os.path.join(scratch, ready[0]), os.path.join(DOWNLOAD_FOLDER, f"{pmid}.pdf"))
+                return True
+            time.sleep(1)
+        return False
+
+    # --- orchestration ---
+    def _put(self, q, item, stage: str):
+        """Put with back-pressure; gives up once the run is aborted.
+
+        If every worker of the receiving stage has died nothing would ever
+        drain the queue, so the whole run is aborted instead of hanging.
+        """
+        while not self.abort.is_set():
+            try:
+                q.put(item, timeout=POLL_INTERVAL)
+                return
+            except queue.Full:
+                if not any(t.is_alive() for t in self.workers[stage]):
+                    print(f"⚠️ All {stage} workers have stopped, aborting the run")
+                    self.abort.set()
+
+    def _get(self, q):
+        """Get the next item, or _STOP once the run is aborted."""
+        while not self.abort.is_set():
+            try:
+                return q.get(timeout=POLL_INTERVAL)
+            except queue.Empty:
+                pass
+        return _STOP
+
+    @staticmethod
+    def _guard(target, *args):
+        """Thread body: report a crashed worker instead of dying silently."""
+        try:
+            target(*args)
+        except Exception as e:
+            print(f"⚠️ {threading.current_thread().name} stopped → {e}")
+
+    @staticmethod
+    def _join(threads, timeout=None):
+        # Short joins so Ctrl-C reaches the main thread (plain join() blocks it on Windows)
+        deadline = None if timeout is None else time.time() + timeout
+        for t in threads:
+            while t.is_alive() and (deadline is None or time.time() < deadline):
+                t.join(POLL_INTERVAL)
+
+    def run(self):
+        for kw_index, kw in enumerate(self.keywords):
+            self.keyword_queue.put((kw_index, kw))
+
+        pool = ProcessPoolExecutor(max_workers=pdf_text.MAX_WORKERS)
+        self.pool = pool
+        try:
+            self._run_stages()
+        finally:
+            pool.shutdown(wait=not self.abort.is_set(), cancel_futures=self.abort.is_set())
+            self.pool = None
+
+    def _run_stages(self):
+        counts = {"search": SEARCH_WORKERS, "screen": SCREEN_WORKERS,
+                  "download": DOWNLOAD_WORKERS, "extract": EXTRACT_WORKERS}
+        targets = {"search": self.search_worker, "screen": self.screen_worker,
+                   "download": self.download_worker, "extract": self.extract_worker}
+        for stage, n in counts.items():
+            self.workers[stage] = [
+                threading.Thread(target=self._guard,
+                                 args=(targets[stage],) + ((i,) if stage == "download" else ()),
+                                 name=f"{stage}-{i}", daemon=True)
+                for i in range(n)]
+        for threads in self.workers.values():
+            for t in threads:
+                t.start()
+
+        # Shut the stages down in order: each one gets a stop marker per worker
+        # once everything upstream of it has finished.
+        downstream = {"search": self.screen_queue, "screen": self.download_queue,
+                      "download": self.extract_queue, "extract": None}
+        stages = list(counts)
+        try:
+            for stage, next_stage in zip(stages, stages[1:] + [None]):
+                self._join(self.workers[stage])
+                self.stats[stage].stop()
+                if next_stage:
+                    for _ in self.workers[next_stage]:
+                        self._put(downstream[stage], _STOP, next_stage)
+        except BaseException:
+            self.abort.set()
+            raise
+        finally:
+            if self.abort.is_set():
+                # Workers notice the abort within POLL_INTERVAL; give downloads in
+                # flight time to finish so every Chrome instance is closed.
+                self._join([t for threads in self.workers.values() for t in threads],
+                           timeout=DOWNLOAD_TIMEOUT + 10)
+                for stats in self.stats.values():
+                    if stats.finished is None:
+                        stats.stop()
+
+
+def main():
+    os.makedirs(DOWNLOAD_FOLDER, exist_ok=True)
+
+    _, keywords = LS.load_keywords(KEYWORDS_EXCEL)
+    print(f"✅ Filtered {len(keywords)} keywords starting with '#'")
+
+    ifu_text = PS.read_ifu_from_pdf(IFU_PDF)
+    print(f" Loaded IFU PDF ({len(ifu_text)} characters)")
+
+    pipeline = Pipeline(keywords, ifu_text)
+    started = time.time()
+    try:
+        pipeline.run()
+    except KeyboardInterrupt:
+        print("\n⚠️ Interrupted, saving partial results")
+    elapsed = time.time() - started
+    save_results(pipeline)
+
+    print(f"\n---- Throughput ({elapsed:.1f}s total) ----")
+    for stats in pipeline.stats.values():
+        print(stats.report())
+
+
+def save_results(pipeline: Pipeline):
+    master_rows = pipeline.master_rows()
+    master_df = pd.DataFrame(master_rows)
+    if not master_df.empty:
+        master_df.insert(0, "Sr.No", range(1, len(master_df) + 1))
+
+    # Screening/download rows arrive in thread order; list them in Master order.
+    # Copied under the lock since workers may still be finishing after an abort.
+    rank = {r["PMID"]: i for i, r in enumerate(master_rows)}
+    with pipeline._lock:
+        screening = sorted(pipeline.screening, key=lambda r: rank.get(r["PMID"], len(rank)))
+        downloads = sorted(pipeline.downloads, key=lambda r: rank.get(r["PMID"], len(rank)))
+        extracted = sorted(pipeline.extracted, key=lambda r: rank.get(r["PMID"], len(rank)))
+        missed = list(pipeline.missed)
+        hits = [(k, pipeline.hit_counts[k], pipeline.fetched_counts.get(k, 0))
+                for k, _, _ in pipeline.keywords if k in pipeline.hit_counts]
+
+    with pd.ExcelWriter(OUTPUT_EXCEL, engine="openpyxl") as writer:
+        master_df.to_excel(writer, sheet_name="Master", index=False)
+        pd.DataFrame(screening).to_excel(writer, sheet_name="Screening", index=False)
+        pd.DataFrame(downloads).to_excel(writer, sheet_name="Downloads", index=False)
+        pd.DataFrame(extracted).to_excel(writer, sheet_name="Full Text", index=False)
+        pd.DataFrame(missed, columns=["Keyword No.", "Keywords", "Reason"]).to_excel(
+            writer, sheet_name="Missed", index=False)
+        pd.DataFrame(hits, columns=["Keyword No.", "Number of Hits", "Fetched"]).to_excel(
+            writer, sheet_name="Hits", index=False)
+    partial = " (partial run)" if pipeline.abort.is_set() else ""
+    print(f"\n Results saved to {OUTPUT_EXCEL}{partial}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,7 +3,7 @@ import requests
 import pandas as pd
 import json
 import re
-from PyPDF2 import PdfReader  # <-- added
+from pdf_text import extract_pdfs, document_text
 
 # ---------------- CONFIG ----------------
 API_URL = "http://localhost:7860/api/v1/run/primaryscreen"
@@ -18,19 +18,21 @@ INPUT_SHEET = "Master"
 OUTPUT_EXCEL = "screening_results.xlsx"
 
 IFU_PDF = "ifu.pdf"  # PDF file should be in same folder
+
+REQUEST_TIMEOUT = 300  # seconds to wait for one LangFlow answer
+DEBUG = True           # print status + start of the raw response for every call
 # ----------------------------------------
 
 
 def read_ifu_from_pdf(pdf_path: str) -> str:
-    """Extract all text from a PDF file."""
+    """Extract all text from a PDF file (cached after the first run, see pdf_text.py)."""
     if not os.path.exists(pdf_path):
         raise FileNotFoundError(f"IFU PDF not found: {pdf_path}")
 
-    reader = PdfReader(pdf_path)
-    text = []
-    for page in reader.pages:
-        text.append(page.extract_text() or "")
-    return "\n".join(text).strip()
+    doc = extract_pdfs([pdf_path]).get(pdf_path)
+    if doc is None:
+        raise ValueError(f"Could not extract text from IFU PDF: {pdf_path}")
+    return document_text(doc)
 
 
 def clean_json_text(text: str) -> str:
@@ -40,8 +42,8 @@ def clean_json_text(text: str) -> str:
     return text.strip("` \n\t")
 
 
-def call_langflow(ifu: str, abstract: str):
-    """Call LangFlow API for one abstract."""
+def call_langflow(ifu: str, abstract: str, label: str = ""):
+    """Call LangFlow API for one abstract (label tags the debug output, e.g. the PMID)."""
     headers = {
         "Content-Type": "application/json",
         "x-api-key": API_KEY,
@@ -60,13 +62,14 @@ def call_langflow(ifu: str, abstract: str):
     }
 
     try:
-        response = requests.post(API_URL, json=payload, headers=headers)
+        response = requests.post(API_URL, json=payload, headers=headers, timeout=REQUEST_TIMEOUT)
 
-        # --- DEBUG ---
-        print("\n--- API DEBUG ---")
-        print("Status:", response.status_code)
-        print("Raw Response:", response.text[:300])
-        print("--- END DEBUG ---\n")
+        # --- DEBUG --- (one print so output from parallel callers doesn't interleave)
+        if DEBUG:
+            print(f"\n--- API DEBUG {label} ---\n"
+                  f"Status: {response.status_code}\n"
+                  f"Raw Response: {response.text[:300]}\n"
+                  f"--- END DEBUG ---\n")
 
         response.raise_for_status()
         return response.json()
@@ -74,6 +77,31 @@ def call_langflow(ifu: str, abstract: str):
         return {"Decision": "ERROR", "Rationale": str(e)}
 
 
+def screen_abstract(ifu: str, abstract: str, label: str = "") -> dict:
+    """Screen one abstract and return its Decision/Category/ExcludedCriteria/Rationale."""
+    result = call_langflow(ifu, abstract, label)
+
+    # Handle LangFlow wrapper
+    if isinstance(result, dict) and "outputs" in result:
+        try:
+            text_out = result["outputs"][0]["outputs"][0]["results"]["message"]["text"]
+            clean_text = clean_json_text(text_out)
+            result = json.loads(clean_text)
+        except Exception as e:
+            result = {"Decision": "ERROR", "Rationale": f"Parse error: {e}"}
+
+    if not isinstance(result, dict):
+        result = {"Decision": "ERROR", "Rationale": f"Unexpected response: {str(result)[:300]}"}
+
+    excluded = result.get("ExcludedCriteria")
+    return {
+        "Decision": result.get("Decision"),
+        "Category": result.get("Category"),
+        "ExcludedCriteria": ",".join(str(c) for c in excluded) if isinstance(excluded, list) else excluded,
+        "Rationale": result.get("Rationale"),
+    }
+
+
 def main():
     # Read IFU text from PDF
     ifu_text = read_ifu_from_pdf(IFU_PDF)
@@ -92,26 +120,8 @@ def main():
 
         print(f"Processing PMID={pmid}...")
 
-        result = call_langflow(ifu_text, abstract)
-
-        # Handle LangFlow wrapper
-        if "outputs" in result:
-            try:
-                text_out = result["outputs"][0]["outputs"][0]["results"]["message"]["text"]
-                clean_text = clean_json_text(text_out)
-                result = json.loads(clean_text)
-            except Exception as e:
-                result = {"Decision": "ERROR", "Rationale": f"Parse error: {e}"}
-
-        record = {
-            "PMID": pmid,
-            "Abstract": abstract,
-            "Decision": result.get("Decision"),
-            "Category": result.get("Category"),
-            "ExcludedCriteria": ",".join(result.get("ExcludedCriteria", []))
-            if isinstance(result.get("ExcludedCriteria"), list) else result.get("ExcludedCriteria"),
-            "Rationale": result.get("Rationale"),
-        }
+        record = {"PMID": pmid, "Abstract": abstract}
+        record.update(screen_abstract(ifu_text, abstract, f"PMID={pmid}"))
         results.append(record)
 
     out_df = pd.DataFrame(results)
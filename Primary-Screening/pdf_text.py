@@ -0,0 +1,207 @@
+import os
+import re
+import sys
+import gzip
+import json
+import time
+import hashlib
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from PyPDF2 import PdfReader
+
+# PDF text extraction with a persistent cache.
+# Pages are extracted in parallel across a process pool (several documents at
+# once, each split into page chunks). Results are stored gzip-compressed under
+# CACHE_DIR, keyed by the SHA-256 of the PDF bytes, so each file is parsed once.
+
+# ---------------- CONFIG ----------------
+script_dir = os.path.dirname(os.path.abspath(__file__))
+repo_dir = os.path.dirname(script_dir)
+
+CACHE_DIR = os.path.join(script_dir, "text-cache")
+DOWNLOAD_FOLDER = os.path.join(repo_dir, "Secondary-Screening-pdf-download", "pdf download")
+IFU_PDF = os.path.join(script_dir, "ifu.pdf")
+
+MAX_WORKERS = None        # None = one process per CPU
+PAGES_PER_TASK = 8        # pages handed to a worker in one go
+CACHE_VERSION = 3         # bump when SECTION_RE or the cached layout changes
+# ----------------------------------------
+
+# Well-known paper / IFU section headings (matched in any case).
+HEADINGS = (
+    r"abstract|background|introduction|materials? and methods|patients and methods|methods|methodology"
+    r"|results|discussion|conclusions?|limitations|references|acknowledg(?:e)?ments"
+    r"|statistical analysis|study design|indications(?: for use)?|contraindications"
+    r"|warnings|precautions|adverse (?:events|effects)|device description|intended use"
+)
+# Title-case phrase for numbered subsections ("Study Population", "Follow-up of Patients").
+TITLE = r"[A-Z][A-Za-z-]*(?:[ \t]+(?:[A-Z][A-Za-z-]*|of|and|in|for|the|with|to|on|a|an|vs)){0,7}"
+
+# A heading is a line of its own holding either a known heading, optionally
+# numbered ("3. Results"), or a multi-level number and a title-case phrase
+# ("2.1 Study Population"). A single number followed by arbitrary capitalised
+# text is not enough: wrapped body lines ("12 Patients were enrolled"), years,
+# affiliations ("2 Department of Surgery") and references all look like that.
+SECTION_RE = re.compile(
+    r"^\s*(?:(?:\d{1,2}\.?\s+)?(?i:" + HEADINGS + r")\s*:?"
+    r"|\d{1,2}(?:\.\d{1,2})+\.?\s+" + TITLE + r")\s*$"
+)
+
+
+def file_sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _cache_path(sha: str) -> str:
+    return os.path.join(CACHE_DIR, f"{sha}.json.gz")
+
+
+def load_cached(sha: str):
+    path = _cache_path(sha)
+    if not os.path.exists(path):
+        return None
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            doc = json.load(f)
+    except (OSError, ValueError):
+        return None  # corrupt entry, re-extract
+    if not isinstance(doc, dict) or doc.get("version") != CACHE_VERSION:
+        return None  # written by an older layout, re-extract
+    return doc
+
+
+def save_cached(doc: dict):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    # Unique temp file: several threads may save the same document at once
+    fd, tmp = tempfile.mkstemp(dir=CACHE_DIR, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as raw, gzip.open(raw, "wt", encoding="utf-8") as f:
+            json.dump(doc, f, ensure_ascii=False)
+        os.replace(tmp, _cache_path(doc["sha256"]))
+    except BaseException:
+        os.remove(tmp)
+        raise
+
+
+def split_sections(pages):
+    """Split page texts into [{"title", "text"}] using heading lines."""
+    sections = [{"title": "", "lines": []}]
+    for page in pages:
+        for line in page.splitlines():
+            if SECTION_RE.match(line):
+                sections.append({"title": line.strip().rstrip(":"), "lines": []})
+            else:
+                sections[-1]["lines"].append(line)
+    out = []
+    for s in sections:
+        text = "\n".join(s["lines"]).strip()
+        if s["title"] or text:
+            out.append({"title": s["title"], "text": text})
+    return out
+
+
+def _extract_pages(path: str, start: int, stop: int):
+    """Worker: extract text of pages [start, stop) from one PDF."""
+    reader = PdfReader(path)
+    return start, [(reader.pages[i].extract_text() or "") for i in range(start, stop)]
+
+
+def extract_pdfs(paths, max_workers=MAX_WORKERS, pool=None, verbose=True):
+    """Return {path: {"version", "sha256", "source", "pages", "sections", "cached"}} for the PDFs in paths.
+
+    Cached documents are loaded directly (cached=True); the rest are extracted
+    in parallel (on `pool` if given, otherwise on a pool created for this call)
+    and written to the cache. Files that can't be read are reported and left out.
+    """
+    started = time.time()
+    docs = {}
+    pending = {}   # path -> (sha, page_count)
+    failed = 0
+    for path in paths:
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"PDF not found: {path}")
+        sha = file_sha256(path)
+        cached = load_cached(sha)
+        if cached is not None:
+            docs[path] = {**cached, "cached": True}
+            continue
+        try:
+            pending[path] = (sha, len(PdfReader(path).pages))
+        except Exception as e:
+            print(f"⚠️ Failed to open {os.path.basename(path)} → {e}")
+            failed += 1
+
+    from_cache = len(docs)
+    new_pages = 0
+    if pending:
+        results = {path: [None] * count for path, (_, count) in pending.items()}
+        own_pool = pool is None
+        if own_pool:
+            pool = ProcessPoolExecutor(max_workers=max_workers)
+        try:
+            futures = {}
+            for path, (_, count) in pending.items():
+                for start in range(0, count, PAGES_PER_TASK):
+                    fut = pool.submit(_extract_pages, path, start, min(start + PAGES_PER_TASK, count))
+                    futures[fut] = path
+            for fut, path in futures.items():
+                try:
+                    start, texts = fut.result()
+                except Exception as e:
+                    if results[path] is not None:
+                        print(f"⚠️ Failed to extract {os.path.basename(path)} → {e}")
+                    results[path] = None
+                    continue
+                if results[path] is not None:
+                    results[path][start:start + len(texts)] = texts
+        finally:
+            if own_pool:
+                pool.shutdown()
+
+        for path, pages in results.items():
+            if pages is None:
+                failed += 1
+                continue
+            doc = {
+                "version": CACHE_VERSION,
+                "sha256": pending[path][0],
+                "source": os.path.basename(path),
+                "pages": pages,
+                "sections": split_sections(pages),
+            }
+            save_cached(doc)
+            docs[path] = {**doc, "cached": False}
+            new_pages += len(pages)
+
+    if verbose:
+        elapsed = max(time.time() - started, 1e-9)
+        print(f" Extracted {new_pages} pages from {len(docs) - from_cache} PDFs in {elapsed:.1f}s "
+              f"→ {new_pages / elapsed:.1f} pages/sec ({from_cache} from cache, {failed} failed)")
+    return docs
+
+
+def document_text(doc: dict) -> str:
+    return "\n".join(doc["pages"]).strip()
+
+
+def main():
+    paths = [IFU_PDF] if os.path.exists(IFU_PDF) else []
+    if os.path.isdir(DOWNLOAD_FOLDER):
+        paths += [os.path.join(DOWNLOAD_FOLDER, f) for f in sorted(os.listdir(DOWNLOAD_FOLDER))
+                  if f.lower().endswith(".pdf")]
+    if not paths:
+        print("⚠️ No PDFs found.")
+        sys.exit()
+
+    docs = extract_pdfs(paths)
+    for path, doc in docs.items():
+        print(f"[{os.path.basename(path)}] {len(doc['pages'])} pages, {len(doc['sections'])} sections")
+    print(f"\n Text cache: {CACHE_DIR}")
+
+
+if __name__ == "__main__":
+    main()
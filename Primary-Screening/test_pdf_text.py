@@ -0,0 +1,59 @@
+import pytest
+
+import pdf_text
+
+
+@pytest.mark.parametrize("line", [
+    "Abstract",
+    "INTRODUCTION",
+    "Materials and Methods",
+    "Conclusions:",
+    "1. Introduction",
+    "3 Results",
+    "2.1 Study Population",
+    "2.3. Statistical Analysis",
+    "3.2 Follow-up of Patients",
+    "Indications for Use",
+])
+def test_heading_lines_start_sections(line):
+    assert pdf_text.SECTION_RE.match(line)
+
+
+@pytest.mark.parametrize("line", [
+    "12 Patients were enrolled in the study and",
+    "24 Hours after implantation the",
+    "3 Patients (10%) experienced adverse events",
+    "3 patients had complications at follow-up",
+    "10 Hospital A",
+    "2 Department of Surgery and Medicine",
+    "2019 was a good year",
+    "2019 Results",
+    "1. Smith J, et al. Outcomes of stenting.",
+    "2.5 hours after the procedure",
+    "results of the trial",
+])
+def test_body_lines_do_not_start_sections(line):
+    assert not pdf_text.SECTION_RE.match(line)
+
+
+def test_split_sections():
+    pages = ["Title\nAbstract\nshort summary\n1. Introduction\n12 Patients were enrolled",
+             "in the study\nReferences\n1. Smith J, et al. Outcomes of stenting."]
+    assert pdf_text.split_sections(pages) == [
+        {"title": "", "text": "Title"},
+        {"title": "Abstract", "text": "short summary"},
+        {"title": "1. Introduction", "text": "12 Patients were enrolled\nin the study"},
+        {"title": "References", "text": "1. Smith J, et al. Outcomes of stenting."},
+    ]
+
+
+def test_cache_ignores_other_versions(tmp_path, monkeypatch):
+    monkeypatch.setattr(pdf_text, "CACHE_DIR", str(tmp_path))
+    doc = {"version": pdf_text.CACHE_VERSION, "sha256": "abc", "source": "x.pdf",
+           "pages": ["text"], "sections": []}
+    pdf_text.save_cached(doc)
+    assert pdf_text.load_cached("abc") == doc
+    assert [p.name for p in tmp_path.iterdir()] == ["abc.json.gz"]
+
+    pdf_text.save_cached({**doc, "version": pdf_text.CACHE_VERSION - 1})
+    assert pdf_text.load_cached("abc") is None